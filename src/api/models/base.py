@@ -3,6 +3,8 @@ import uuid
 from abc import ABC, abstractmethod
 from typing import AsyncIterable
 
+import orjson
+
 from api.schema import (
     # Chat
     ChatResponse,
@@ -13,6 +15,17 @@ from api.schema import (
     EmbeddingsResponse,
 )
 
+# [timestamp, monotonic ns when it was taken], refreshed at most twice per second
+_cached_epoch = [int(time.time()), time.monotonic_ns()]
+
+
+def current_timestamp() -> int:
+    """Return the current unix time in seconds, as used for the `created` field of responses."""
+    now = time.monotonic_ns()
+    if now - _cached_epoch[1] > 500_000_000:
+        _cached_epoch[:] = [int(time.time()), now]
+    return _cached_epoch[0]
+
 
 class BaseChatModel(ABC):
     """Represent a basic chat model
@@ -29,7 +42,7 @@ class BaseChatModel(ABC):
         pass
 
     @abstractmethod
-    def chat(self, chat_request: ChatRequest) -> ChatResponse:
+    async def chat(self, chat_request: ChatRequest) -> ChatResponse:
         """Handle a basic chat completion requests."""
         pass
 
@@ -50,10 +63,29 @@ class BaseChatModel(ABC):
             # to populate other fields when using exclude_unset=True
             response.system_fingerprint = "fp"
             response.object = "chat.completion.chunk"
-            response.created = int(time.time())
+            response.created = current_timestamp()
             return "data: {}\n\n".format(response.model_dump_json(exclude_unset=True)).encode("utf-8")
         return "data: [DONE]\n\n".encode("utf-8")
 
+    @staticmethod
+    def stream_content_to_bytes(message_id: str, model: str, content: str) -> bytes:
+        """Encode a text-only delta chunk without building the Pydantic models.
+
+        Produces the same payload as `stream_response_to_bytes` for a `ChatStreamResponse` carrying only content.
+        """
+        chunk = {
+            "id": message_id,
+            "created": current_timestamp(),
+            "model": model,
+            "system_fingerprint": "fp",
+            "choices": [
+                {"index": 0, "finish_reason": None, "logprobs": None, "delta": {"content": content}}
+            ],
+            "object": "chat.completion.chunk",
+            "usage": None,
+        }
+        return b"data: " + orjson.dumps(chunk) + b"\n\n"
+
 
 class BaseEmbeddingsModel(ABC):
     """Represents a basic embeddings model.
@@ -1,25 +1,34 @@
-import base64
+import asyncio
 import json
 import logging
 import os
 import re
+import struct
+import threading
 import time
 from abc import ABC
-from copy import deepcopy
+from concurrent.futures import ThreadPoolExecutor
 from functools import cache
+from types import MappingProxyType
 from typing import AsyncIterable, Iterable, Literal, Any
 from urllib.parse import quote, urlparse
 
+import aioboto3
 import boto3
 
 # boto3.setup_default_session(profile_name='mldc')
 import numpy as np
+import orjson
+import pybase64
 import requests
 import tiktoken
+from aiobotocore.config import AioConfig
 from botocore.config import Config
+from cachetools import LRUCache, TTLCache, cached
 from fastapi import HTTPException
+from requests.adapters import HTTPAdapter
 
-from api.models.base import BaseChatModel, BaseEmbeddingsModel
+from api.models.base import BaseChatModel, BaseEmbeddingsModel, current_timestamp
 from api.schema import (
     # Chat
     ChatResponse,
@@ -42,27 +51,34 @@ from api.schema import (
     EmbeddingsResponse,
     EmbeddingsUsage,
     Embedding, )
-from api.setting import DEBUG, AWS_REGION
+from api.setting import DEBUG, AWS_REGION, BEDROCK_LATENCY_OPTIMIZED
 
 logger = logging.getLogger(__name__)
 
 config = Config(connect_timeout=60, read_timeout=2000, retries={"max_attempts": 5})
+aio_config = AioConfig(connect_timeout=60, read_timeout=2000, retries={"max_attempts": 5})
 
-lambda_client = boto3.client('lambda', config=config, region_name=AWS_REGION, )
+# Async session for the chat path, clients are created per request with `async with aws_session.client(...)`
+aws_session = aioboto3.Session(region_name=AWS_REGION)
 
-bedrock_runtime = boto3.client(
-    service_name="bedrock-runtime",
-    region_name=AWS_REGION,
-    config=config,
-)
-bedrock_client = boto3.client(
-    service_name='bedrock',
-    region_name=AWS_REGION,
-    config=config,
-)
 
-bedrock_agent_client = boto3.client('bedrock-agent', region_name=AWS_REGION, config=config)
-bedrock_agent_runtime = boto3.client('bedrock-agent-runtime', region_name=AWS_REGION, config=config)
+# Synchronous clients and the tokenizer are created on first use to keep cold starts fast.
+@cache
+def get_bedrock_runtime():
+    return boto3.client(
+        service_name="bedrock-runtime",
+        region_name=AWS_REGION,
+        config=config,
+    )
+
+
+@cache
+def get_bedrock_client():
+    return boto3.client(
+        service_name='bedrock',
+        region_name=AWS_REGION,
+        config=config,
+    )
 
 
 def get_inference_region_prefix():
@@ -82,7 +98,39 @@ SUPPORTED_BEDROCK_EMBEDDING_MODELS = {
     # "amazon.titan-embed-image-v1": "Titan Multimodal Embeddings G1"
 }
 
-ENCODER = tiktoken.get_encoding("cl100k_base")
+# Models supporting latency-optimized inference, matched against the model id.
+# https://docs.aws.amazon.com/bedrock/latest/userguide/latency-optimized-inference.html
+LATENCY_OPTIMIZED_MODELS = ("claude-3-5-haiku", "llama3-1-70b", "llama3-1-405b", "nova-pro")
+
+# Output token limits by model family, matched against the model id.
+MAX_TOKENS = {"claude-3-7": 131072, "llama4": 8192}
+DEFAULT_MAX_TOKENS = 32768
+
+
+@cache
+def get_max_tokens(model_id: str) -> int:
+    family = next((k for k in MAX_TOKENS if k in model_id), None)
+    return MAX_TOKENS.get(family, DEFAULT_MAX_TOKENS)
+
+
+# Bedrock stop reasons to OpenAI finish reasons.
+FINISH_REASON_MAPPING = MappingProxyType({
+    "tool_use": "tool_calls",
+    "finished": "stop",
+    "end_turn": "stop",
+    "max_tokens": "length",
+    "stop_sequence": "stop",
+    "complete": "stop",
+    "content_filtered": "content_filter"
+})
+
+# Maximum number of knowledge base documents attached to a single request.
+MAX_REFERENCES = 20
+
+
+@cache
+def get_encoder() -> tiktoken.Encoding:
+    return tiktoken.get_encoding("cl100k_base")
 
 
 def list_bedrock_models() -> dict:
@@ -97,14 +145,14 @@ def list_bedrock_models() -> dict:
     #     profile_list = []
     #     if ENABLE_CROSS_REGION_INFERENCE:
     #         # List system defined inference profile IDs
-    #         response = bedrock_client.list_inference_profiles(
+    #         response = get_bedrock_client().list_inference_profiles(
     #             maxResults=1000,
     #             typeEquals='SYSTEM_DEFINED'
     #         )
     #         profile_list = [p['inferenceProfileId'] for p in response['inferenceProfileSummaries']]
     #
     #     # List foundation models, only cares about text outputs here.
-    #     response = bedrock_client.list_foundation_models(
+    #     response = get_bedrock_client().list_foundation_models(
     #         byOutputModality='TEXT'
     #     )
     #
@@ -142,13 +190,77 @@ def list_bedrock_models() -> dict:
     #     }
 
     # return model_list
-    return {'global.anthropic.claude-opus-4-5-20251101-v1:0': {'modalities': ['TEXT', 'IMAGE']}, 'us.anthropic.claude-3-7-sonnet-20250219-v1:0': {'modalities': ['TEXT', 'IMAGE']}, 'us.anthropic.claude-opus-4-20250514-v1:0': {'modalities': ['TEXT', 'IMAGE']}, 'us.anthropic.claude-sonnet-4-20250514-v1:0': {'modalities': ['TEXT', 'IMAGE']},
-            'us.meta.llama4-maverick-17b-instruct-v1:0': {'modalities': ['TEXT', 'IMAGE']}, 'us.deepseek.r1-v1:0': {'modalities': ['TEXT']}}
+    model_list = {'global.anthropic.claude-opus-4-5-20251101-v1:0': {'modalities': ['TEXT', 'IMAGE']}, 'us.anthropic.claude-3-7-sonnet-20250219-v1:0': {'modalities': ['TEXT', 'IMAGE']}, 'us.anthropic.claude-opus-4-20250514-v1:0': {'modalities': ['TEXT', 'IMAGE']}, 'us.anthropic.claude-sonnet-4-20250514-v1:0': {'modalities': ['TEXT', 'IMAGE']},
+                  'us.meta.llama4-maverick-17b-instruct-v1:0': {'modalities': ['TEXT', 'IMAGE']}, 'us.deepseek.r1-v1:0': {'modalities': ['TEXT']}}
+
+    # Modalities are checked for every image part, store them as sets
+    for model in model_list.values():
+        model['modalities'] = frozenset(model.get('modalities', ()))
+    return model_list
 
 
 # Initialize the model list.
 bedrock_model_list = list_bedrock_models()
 
+# Matches the `@tools`, `@thinking` and `@<knowledge base name>` tags in a message.
+# Tags must start a word, so e-mail addresses are not mistaken for tags.
+_TAG_RE = re.compile(r"(?<!\S)@([A-Za-z0-9_\-]+)")
+
+# Keep-alive connections for fetching image urls.
+http_session = requests.Session()
+http_session.mount("https://", HTTPAdapter(pool_connections=32, pool_maxsize=64))
+
+# Worker threads for fetching the images of a message concurrently.
+image_fetch_executor = ThreadPoolExecutor(max_workers=16, thread_name_prefix="image-fetch")
+
+# Bedrock rejects images larger than 3.75 MB.
+MAX_IMAGE_BYTES = 3932160
+
+# Recently fetched remote images, bounded by the total size of the image data.
+# Data urls are not cached, decoding them is cheaper than hashing them.
+image_cache = LRUCache(maxsize=64 * 1024 * 1024, getsizeof=lambda image: len(image[0]))
+image_cache_lock = threading.Lock()
+
+
+def image_cache_key(_, image_url: str) -> str:
+    # Shared across model instances, so leave `self` out of the key
+    return image_url
+
+
+# Header of a base64 encoded image data url.
+_DATA_URI_RE = re.compile(r"^data:(image/[a-z]*);base64,\s*")
+
+# URLs made of these characters only are already safe to embed in a markdown link.
+_SAFE_URL_RE = re.compile(r"[A-Za-z0-9:/?&=%._~+\-]*")
+
+
+def _safe_url(url: str) -> str:
+    """Quote the path of a reference url so that it can be used as a markdown link."""
+    if _SAFE_URL_RE.fullmatch(url):
+        return url
+    parsed_url = urlparse(url)
+    safe = f"{parsed_url.scheme}://{parsed_url.netloc}{quote(parsed_url.path)}"
+    if parsed_url.query:
+        safe += f"?{parsed_url.query}"
+    return safe
+
+
+# Knowledge bases rarely change, keep the list for a minute instead of calling the API on every chat turn.
+_KB_CACHE = TTLCache(maxsize=1, ttl=60)
+
+
+async def list_knowledge_bases() -> list[dict]:
+    """Return the active knowledge bases, cached for `_KB_CACHE.ttl` seconds."""
+    kbs = _KB_CACHE.get("kbs")
+    if kbs is None:
+        async with aws_session.client("bedrock-agent", config=aio_config) as bedrock_agent_client:
+            response = await bedrock_agent_client.list_knowledge_bases()
+        kbs = [{"name": row["name"], "knowledgeBaseId": row["knowledgeBaseId"]} for row in
+               response["knowledgeBaseSummaries"] if
+               row["status"] in ("ACTIVE", "UPDATING")]
+        _KB_CACHE["kbs"] = kbs
+    return kbs
+
 
 class BedrockModel(BaseChatModel):
 
@@ -171,67 +283,86 @@ class BedrockModel(BaseChatModel):
                 detail=error,
             )
 
-    def _invoke_bedrock(self, chat_request: ChatRequest, stream=False):
-        """Common logic for invoke bedrock models"""
-        if DEBUG:
-            logger.info("Raw request: " + chat_request.model_dump_json())
+    async def _invoke_bedrock(self, chat_request: ChatRequest, bedrock_runtime, stream=False):
+        """Common logic for invoke bedrock models
 
-        logger.info(f"LENGTH OF REQUEST: {len(chat_request.model_dump_json())}")
+        The caller owns the `bedrock_runtime` client, so that a stream response can be consumed before it is closed.
+        """
+        if DEBUG:
+            # Serializing the whole history is costly, only do it when debugging
+            payload = chat_request.model_dump_json()
+            logger.info("LENGTH OF REQUEST: %d", len(payload))
+            logger.info("Raw request: %s", payload)
 
         # convert OpenAI chat request to Bedrock SDK request
-        args = self._parse_request(chat_request)
+        args = await self._parse_request(chat_request)
         if DEBUG:
-            logger.info("Bedrock request: " + json.dumps(str(args)))
+            logger.info("Bedrock request: %s", args)
 
-        kbs = [{"name": row["name"], "knowledgeBaseId": row["knowledgeBaseId"]} for row in
-               bedrock_agent_client.list_knowledge_bases()["knowledgeBaseSummaries"] if
-               row["status"] in ("ACTIVE", "UPDATING")]
         message = args["messages"][-1]["content"][0].get("text", "")
+        tags = set(_TAG_RE.findall(message))
 
         reference_data = dict()
         references = dict()
 
-        for kb in kbs:
-            if f'@{kb["name"]}' in message.split():
-                logger.info(f"Using knowledge base {kb['name']} for text message: {message}")
-                retrieve_response = bedrock_agent_runtime.retrieve(
-                    retrievalQuery={
-                        'text': message.replace(f'@{kb["name"]}', '')[:998]
-                    },
-                    knowledgeBaseId=kb["knowledgeBaseId"],
-                    retrievalConfiguration={
-                        'vectorSearchConfiguration': {
-                            'numberOfResults': 50,
+        matched = []
+        if tags:
+            kbs = await list_knowledge_bases()
+            matched = [kb for kb in kbs if kb["name"] in tags]
+        if matched:
+            async with aws_session.client("bedrock-agent-runtime", config=aio_config) as bedrock_agent_runtime:
+                async def _retrieve(kb: dict) -> tuple[dict, dict]:
+                    logger.info(f"Using knowledge base {kb['name']} for text message: {message}")
+                    return kb, await bedrock_agent_runtime.retrieve(
+                        retrievalQuery={
+                            'text': message.replace(f'@{kb["name"]}', '')[:998]
+                        },
+                        knowledgeBaseId=kb["knowledgeBaseId"],
+                        retrievalConfiguration={
+                            'vectorSearchConfiguration': {
+                                'numberOfResults': 50,
+                            }
                         }
-                    }
-                )
+                    )
+
+                # Query all the referenced knowledge bases concurrently
+                results = await asyncio.gather(*(_retrieve(kb) for kb in matched))
+
+            for kb, retrieve_response in results:
                 if DEBUG:
                     logger.info(f"Got search results of {[row['content']['text'] for row in retrieve_response['retrievalResults']]}")
 
-                for i, row in enumerate(retrieve_response['retrievalResults']):
-                    if row["score"] >= .5:
-                        if "metadata" in row and "x-amz-kendra-document-title" in row["metadata"]:
-                            references[row["metadata"]["x-amz-kendra-document-title"]] = {"title": row["metadata"]["x-amz-kendra-document-title"], "url": row["location"]['kendraDocumentLocation']["uri"]}
-                            reference_data[row["metadata"]["x-amz-kendra-document-title"]] = row['content']['text'].strip()
-
-                if len(reference_data) <= 5:
-                    for title, rows in reference_data.items():
-                        args["messages"][-1]["content"].append({"document": {
-                            'format': 'txt',
-                            'name': title,
-                            'source': {
-                                'bytes': "\n".join(rows).encode()
-                            }
-                        }
-                        })
-                else:
+                # Results come best first, so keep the first hit per document and stop once enough are collected
+                for row in retrieve_response['retrievalResults']:
+                    if len(references) >= MAX_REFERENCES:
+                        break
+                    if row["score"] < .5:
+                        continue
+                    metadata = row.get("metadata")
+                    title = metadata and metadata.get("x-amz-kendra-document-title")
+                    if not title or title in references:
+                        continue
+                    references[title] = {"title": title, "url": row["location"]['kendraDocumentLocation']["uri"]}
+                    reference_data[title] = row['content']['text'].strip()
+
+            if len(reference_data) <= 5:
+                for title, text in reference_data.items():
                     args["messages"][-1]["content"].append({"document": {
                         'format': 'txt',
-                        'name': "combined",
+                        'name': title,
                         'source': {
-                            'bytes': "\n".join(reference_data.values()).encode()
+                            'bytes': text.encode()
                         }
-                    }})
+                    }
+                    })
+            else:
+                args["messages"][-1]["content"].append({"document": {
+                    'format': 'txt',
+                    'name': "combined",
+                    'source': {
+                        'bytes': "\n".join(reference_data.values()).encode()
+                    }
+                }})
 
         if "GUARDRAIL_IDENTIFIER" in os.environ:
             args["guardrailConfig"] = {
@@ -240,7 +371,7 @@ class BedrockModel(BaseChatModel):
                 'trace': 'enabled'
             }
 
-        if "@thinking" in message.split():
+        if "thinking" in tags:
             args["additionalModelRequestFields"] = {
                 "thinking": {
                     "type": "enabled",
@@ -249,9 +380,9 @@ class BedrockModel(BaseChatModel):
             }
         try:
             if stream:
-                response = bedrock_runtime.converse_stream(**args)
+                response = await bedrock_runtime.converse_stream(**args)
             else:
-                response = bedrock_runtime.converse(**args)
+                response = await bedrock_runtime.converse(**args)
         except bedrock_runtime.exceptions.ValidationException as e:
             logger.error("Validation Error: " + str(e))
             raise HTTPException(status_code=400, detail=str(e))
@@ -260,11 +391,12 @@ class BedrockModel(BaseChatModel):
             raise HTTPException(status_code=500, detail=str(e))
         return response, list(references.values())
 
-    def chat(self, chat_request: ChatRequest) -> ChatResponse:
+    async def chat(self, chat_request: ChatRequest) -> ChatResponse:
         """Default implementation for Chat API."""
 
         message_id = self.generate_message_id()
-        response, references = self._invoke_bedrock(chat_request)
+        async with aws_session.client("bedrock-runtime", config=aio_config) as bedrock_runtime:
+            response, references = await self._invoke_bedrock(chat_request, bedrock_runtime)
 
         output_message = response["output"]["message"]
         input_tokens = response["usage"]["inputTokens"]
@@ -272,35 +404,20 @@ class BedrockModel(BaseChatModel):
         finish_reason = response["stopReason"]
 
         if finish_reason == "tool_use":
-            for part in output_message["content"]:
-                if "toolUse" in part:
-                    tool = part["toolUse"]
-                    toolUseId = tool["toolUseId"]
-
-                    response = lambda_client.invoke(
-                        FunctionName=self.get_tool_map()[tool["name"]],
-                        InvocationType='RequestResponse',
-                        Payload=json.dumps(tool["input"]).encode(),
-                    )
-
-                    results = json.load(response["Payload"])
+            tool_map = self.get_tool_map()
+            tool_uses = [part["toolUse"] for part in output_message["content"] if "toolUse" in part]
+            if tool_uses:
+                # Run all the requested tools concurrently, then answer them in a single turn
+                tool_results = await asyncio.gather(
+                    *(self._invoke_tool(tool_map[tool["name"]], tool["input"]) for tool in tool_uses)
+                )
+                tool_messages = [
+                    self._to_tool_message(tool["toolUseId"], results) for tool, results in zip(tool_uses, tool_results)
+                ]
 
-                    if not results["success"]:
-                        content = results["message"]
-                    elif results.get("data_type", "json") == "json":
-                        content = {"results": results["results"]}
-                    else:
-                        content = results["results"]
-                        if results.get("data_type") == "image":
-                            content["source"]["bytes"] = base64.b64decode(results["results"]["source"]["bytes"])
-
-                    args = chat_request.model_dump()
-                    del args["messages"]
-                    args["messages"] = chat_request.messages + [output_message, ToolMessage(
-                        tool_call_id=toolUseId,
-                        content=content, status=None if results["success"] else "error",
-                        data_type=results.get("data_type", "json"))]
-                    return self.chat(ChatRequest(**args))
+                # Only the messages change, so copy the request instead of dumping and re-validating it
+                messages = chat_request.messages + [output_message] + tool_messages
+                return await self.chat(chat_request.model_copy(update={"messages": messages}))
 
         chat_response = self._create_response(
             model=chat_request.model,
@@ -315,9 +432,16 @@ class BedrockModel(BaseChatModel):
 
         return chat_response
 
-    def chat_stream(self, chat_request: ChatRequest) -> AsyncIterable[bytes]:
+    async def chat_stream(self, chat_request: ChatRequest) -> AsyncIterable[bytes]:
         """Default implementation for Chat Stream API"""
-        response, references = self._invoke_bedrock(chat_request, stream=True)
+        async with aws_session.client("bedrock-runtime", config=aio_config) as bedrock_runtime:
+            response, references = await self._invoke_bedrock(chat_request, bedrock_runtime, stream=True)
+            ref_footer = self._build_ref_footer(references)
+            async for chunk in self._stream_chunks(chat_request, response, ref_footer):
+                yield chunk
+
+    async def _stream_chunks(self, chat_request: ChatRequest, response: dict, ref_footer: str) -> AsyncIterable[bytes]:
+        """Convert the Bedrock event stream into OpenAI compatible chunks, invoking tools as requested."""
         message_id = self.generate_message_id()
 
         # Track multiple parallel tool calls by index
@@ -325,7 +449,17 @@ class BedrockModel(BaseChatModel):
         chat_reponse = []
 
         stream = response.get("stream")
-        for chunk in stream:
+        async for chunk in stream:
+            text_delta = chunk.get("contentBlockDelta", {}).get("delta", {}).get("text")
+            if text_delta is not None:
+                # Text deltas are the bulk of the stream, encode them directly instead of via Pydantic models
+                if DEBUG:
+                    logger.info("Bedrock response chunk: %s", chunk)
+                if text_delta:
+                    chat_reponse.append(text_delta)
+                yield self.stream_content_to_bytes(message_id, chat_request.model, text_delta)
+                continue
+
             stream_response = self._create_response_stream(
                 model_id=chat_request.model, message_id=message_id, chunk=chunk
             )
@@ -338,27 +472,21 @@ class BedrockModel(BaseChatModel):
                 if stream_response.choices[0].delta.role == "assistant":
                     chat_reponse = []
                 if stream_response.choices[0].finish_reason == "stop":
-                    if references:
-                        s = "\n\n##### References:\n"
-                        for reference in references:
-                            parsed_url = urlparse(reference['url'])
-                            url = f"{parsed_url.scheme}://{parsed_url.netloc}{quote(parsed_url.path)}"
-                            if parsed_url.query:
-                                url += f"?{parsed_url.query}"
-                            s += f"  * [{reference['title']}]({url})\n"
-                        stream_response.choices[0].delta.content = s
+                    if ref_footer:
+                        stream_response.choices[0].delta.content = ref_footer
                 if stream_response.choices[0].delta.content:
                     chat_reponse.append(stream_response.choices[0].delta.content)
 
                 if stream_response.choices[0].finish_reason == "tool_calls":
                     # Process all accumulated tool calls
-                    args = chat_request.model_dump()
-                    del args["messages"]
                     new_content = []
-                    if chat_reponse:
-                        new_content.append({'text': "".join(chat_reponse)})
+                    # Keep the text streamed before the tool call, Bedrock rejects blank text blocks though
+                    text_so_far = "".join(chat_reponse)
+                    if text_so_far.strip():
+                        new_content.append({'text': text_so_far})
 
                     tool_results = []
+                    tool_map = self.get_tool_map()
 
                     for tool_index in sorted(tool_calls_by_index.keys()):
                         tool_info = tool_calls_by_index[tool_index]
@@ -367,7 +495,7 @@ class BedrockModel(BaseChatModel):
                         tool_args = tool_info.get("args", [])
 
                         try:
-                            function_args = json.loads("".join(tool_args)) if tool_args else {}
+                            function_args = orjson.loads("".join(tool_args)) if tool_args else {}
                         except Exception:
                             logger.exception(f"Error parsing tool_args for {tool_name}")
                             yield self.stream_response_to_bytes(ChatStreamResponse(
@@ -387,49 +515,32 @@ class BedrockModel(BaseChatModel):
 
                         try:
                             t0 = time.time()
-                            logger.info(f"Invoking tool {tool_name} with {function_args} and lambda {self.get_tool_map().get(tool_name)}")
+                            logger.info(f"Invoking tool {tool_name} with {function_args} and lambda {tool_map.get(tool_name)}")
 
-                            response = lambda_client.invoke(
-                                FunctionName=self.get_tool_map()[tool_name],
-                                InvocationType='RequestResponse',
-                                Payload=json.dumps(function_args).encode(),
-                            )
+                            results = await self._invoke_tool(tool_map[tool_name], function_args)
 
                             logger.info(f"Finished tool {tool_name} in {time.time() - t0} seconds")
 
-                            raw_results = response["Payload"].read().decode()
-                            results = json.loads(raw_results)
-
-                            if not results["success"]:
-                                content = results["message"]
-                            elif results.get("data_type", "json") == "json":
-                                content = {"results": results["results"]}
-                            else:
-                                content = results["results"]
-                                if results.get("data_type") == "image":
-                                    content["source"]["bytes"] = base64.b64decode(results["results"]["source"]["bytes"])
-
                             # Add toolUse to assistant message content
                             new_content.append({'toolUse': {'input': function_args, 'name': tool_name, 'toolUseId': toolUseId}})
 
                             # Collect tool result
-                            tool_results.append(ToolMessage(
-                                tool_call_id=toolUseId,
-                                content=content,
-                                status=None if results["success"] else "error",
-                                data_type=results.get("data_type", "json")
-                            ))
+                            tool_results.append(self._to_tool_message(toolUseId, results))
 
                             if results.get("success", False):
-                                if results.get("markdown_format", "json") != "json" or len(json.dumps(results["results"])) < 4000:
-                                    logger.info(f"Returning tool response of size {len(json.dumps(results['results']))}")
+                                markdown_format = results.get("markdown_format", "json")
+                                serialized = orjson.dumps(results["results"])
+                                if markdown_format != "json" or len(serialized) < 4000:
+                                    logger.info("Returning tool response of size %d", len(serialized))
+                                    # Reuse the serialized JSON for the code block, other formats are already text
+                                    body = serialized.decode() if markdown_format == "json" else results["results"]
                                     yield self.stream_response_to_bytes(ChatStreamResponse(
                                         id=message_id,
                                         model=chat_request.model,
                                         choices=[
                                             ChoiceDelta(
                                                 index=0,
-                                                delta=ChatResponseMessage(role="assistant", content=f'\n```{results.get("markdown_format", "json")}\n{results["results"]}\n```\n'),
+                                                delta=ChatResponseMessage(role="assistant", content=f'\n```{markdown_format}\n{body}\n```\n'),
                                                 logprobs=None,
                                                 finish_reason=None,
                                             )
@@ -453,13 +564,16 @@ class BedrockModel(BaseChatModel):
                             return
 
                     # Build the new messages with all tool uses and results
-                    args["messages"] = chat_request.messages + [{'content': new_content, 'role': 'assistant'}] + tool_results
+                    next_request = chat_request.model_copy(
+                        update={"messages": chat_request.messages + [{'content': new_content, 'role': 'assistant'}] + tool_results}
+                    )
 
                     if DEBUG:
-                        logger.info(f"Calling chat_stream with ********{args}*********")
+                        logger.info(f"Calling chat_stream with ********{next_request}*********")
 
                     yield self.stream_response_to_bytes()
-                    yield from self.chat_stream(ChatRequest(**args))
+                    async for data in self.chat_stream(next_request):
+                        yield data
                     return
 
                 elif stream_response.choices[0].delta.tool_calls:
@@ -495,6 +609,45 @@ class BedrockModel(BaseChatModel):
         # return an [DONE] message at the end.
         yield self.stream_response_to_bytes()
 
+    @staticmethod
+    async def _invoke_tool(function_name: str, tool_input: dict) -> dict:
+        """Invoke the Lambda function backing a tool and return its decoded response."""
+        async with aws_session.client("lambda", config=aio_config) as lambda_client:
+            response = await lambda_client.invoke(
+                FunctionName=function_name,
+                InvocationType='RequestResponse',
+                Payload=orjson.dumps(tool_input),
+            )
+            return orjson.loads(await response["Payload"].read())
+
+    @staticmethod
+    def _to_tool_message(tool_use_id: str, results: dict) -> ToolMessage:
+        """Convert a tool Lambda response into the tool result message sent back to the model."""
+        if not results["success"]:
+            content = results["message"]
+        elif results.get("data_type", "json") == "json":
+            content = {"results": results["results"]}
+        else:
+            content = results["results"]
+            if results.get("data_type") == "image":
+                content["source"]["bytes"] = pybase64.b64decode(results["results"]["source"]["bytes"])
+        return ToolMessage(
+            tool_call_id=tool_use_id,
+            content=content,
+            status=None if results["success"] else "error",
+            data_type=results.get("data_type", "json"),
+        )
+
+    @staticmethod
+    def _build_ref_footer(references: list[dict]) -> str:
+        """Render the knowledge base references as a markdown footer, or an empty string if there are none."""
+        if not references:
+            return ""
+        s = "\n\n##### References:\n"
+        for reference in references:
+            s += f"  * [{reference['title']}]({_safe_url(reference['url'])})\n"
+        return s
+
     def _parse_system_prompts(self, chat_request: ChatRequest) -> list[dict[str, str]]:
         """Create system prompts.
         Note that not all models support system prompts.
@@ -516,7 +669,7 @@ class BedrockModel(BaseChatModel):
 
         return system_prompts
 
-    def _parse_messages(self, chat_request: ChatRequest) -> list[dict]:
+    async def _parse_messages(self, chat_request: ChatRequest) -> list[dict]:
         """
         Converse API only support user and assistant messages.
 
@@ -534,7 +687,7 @@ class BedrockModel(BaseChatModel):
                 messages.append(
                     {
                         "role": message.role,
-                        "content": self._parse_content_parts(
+                        "content": await self._parse_content_parts(
                             message, chat_request.model
                         ),
                     }
@@ -550,7 +703,7 @@ class BedrockModel(BaseChatModel):
                     messages.append(
                         {
                             "role": message.role,
-                            "content": self._parse_content_parts(
+                            "content": await self._parse_content_parts(
                                 message, chat_request.model
                             ),
                         }
@@ -627,7 +780,13 @@ class BedrockModel(BaseChatModel):
                         "content": [{"toolResult": tool_result}]
                     })
                 else:
-                    messages.append(message)
+                    # Copy the client's dict, extra keys are not accepted by Bedrock
+                    # and the content may be extended later on (e.g. knowledge base documents)
+                    content = message.get("content")
+                    messages.append({
+                        "role": message.get("role"),
+                        "content": list(content) if isinstance(content, list) else content,
+                    })
             else:
                 # ignore others, such as system messages
                 continue
@@ -657,6 +816,16 @@ class BedrockModel(BaseChatModel):
             },
         ]
         """
+        # Fast path: roles already alternate and every content is a non-empty list, so there is nothing to merge.
+        # The messages built by `_parse_messages` are fresh dicts, safe to hand over as they are.
+        previous_role = None
+        for message in messages:
+            if message['role'] == previous_role or not isinstance(message['content'], list) or not message['content']:
+                break
+            previous_role = message['role']
+        else:
+            return messages
+
         reformatted_messages = []
         current_role = None
         current_content = []
@@ -700,16 +869,17 @@ class BedrockModel(BaseChatModel):
 
     @cache
     def get_tools_config(self):
-        tools = deepcopy(self.get_tools())
-        for tool in tools:
-            del tool["toolSpec"]["lambda_arn"]
-        return tools
+        # Only the toolSpec level changes, the nested schemas can be shared with get_tools()
+        return [
+            {**tool, "toolSpec": {k: v for k, v in tool["toolSpec"].items() if k != "lambda_arn"}}
+            for tool in self.get_tools()
+        ]
 
     @cache
     def get_tool_map(self):
         return {tool["toolSpec"]["name"]: tool["toolSpec"]["lambda_arn"] for tool in self.get_tools()}
 
-    def _parse_request(self, chat_request: ChatRequest) -> dict:
+    async def _parse_request(self, chat_request: ChatRequest) -> dict:
         """Create default converse request body.
 
         Also perform validations to tool call etc.
@@ -717,20 +887,14 @@ class BedrockModel(BaseChatModel):
         Ref: https://docs.aws.amazon.com/bedrock/latest/APIReference/API_runtime_Converse.html
         """
 
-        messages = self._parse_messages(chat_request)
+        messages = await self._parse_messages(chat_request)
         system_prompts = self._parse_system_prompts(chat_request)
 
         # Base inference parameters.
 
-        tokens = 32768
-        if "claude-3-7" in chat_request.model:
-            tokens = 131072
-        if "llama4" in chat_request.model:
-            tokens = 8192
-
         inference_config = {
             "temperature": chat_request.temperature,
-            "maxTokens": tokens,
+            "maxTokens": get_max_tokens(chat_request.model),
             # "topP": chat_request.top_p
         }
 
@@ -741,16 +905,21 @@ class BedrockModel(BaseChatModel):
             inference_config["stopSequences"] = stop
 
         config = {"modelId": chat_request.model, "messages": messages, "system": system_prompts, "inferenceConfig": inference_config}
+        if BEDROCK_LATENCY_OPTIMIZED and any(m in chat_request.model for m in LATENCY_OPTIMIZED_MODELS):
+            config["performanceConfig"] = {"latency": "optimized"}
+        has_tools = has_thinking = False
         for message in messages:
-            if '@tools' in message["content"][0].get("text", ""):
-                config["toolConfig"] = {
-                    "tools": self.get_tools_config()
-                }
-                break
-        for message in messages:
-            if '@thinking' in message["content"][0].get("text", ""):
-                del config["inferenceConfig"]["topP"]
+            tags = _TAG_RE.findall(message["content"][0].get("text", ""))
+            has_tools = has_tools or "tools" in tags
+            has_thinking = has_thinking or "thinking" in tags
+            if has_tools and has_thinking:
                 break
+        if has_tools:
+            config["toolConfig"] = {
+                "tools": self.get_tools_config()
+            }
+        if has_thinking:
+            config["inferenceConfig"].pop("topP", None)
         return config
 
     def _create_response(
@@ -778,7 +947,7 @@ class BedrockModel(BaseChatModel):
                             type="function",
                             function=ResponseFunction(
                                 name=tool["name"],
-                                arguments=json.dumps(tool["input"]),
+                                arguments=orjson.dumps(tool["input"]).decode(),
                             ),
                         )
                     )
@@ -808,7 +977,7 @@ class BedrockModel(BaseChatModel):
         )
         response.system_fingerprint = "fp"
         response.object = "chat.completion"
-        response.created = int(time.time())
+        response.created = current_timestamp()
         return response
 
     def _create_response_stream(
@@ -817,92 +986,117 @@ class BedrockModel(BaseChatModel):
         """Parsing the Bedrock stream response chunk.
 
         Ref: https://docs.aws.amazon.com/bedrock/latest/userguide/conversation-inference.html#message-inference-examples
+
+        The chunks come from the Bedrock SDK, so the models are built with `model_construct` to skip validation.
         """
         if DEBUG:
-            logger.info("Bedrock response chunk: " + str(chunk))
-
-        finish_reason = None
-        message = None
-        usage = None
-        if "messageStart" in chunk:
-            message = ChatResponseMessage(
-                role=chunk["messageStart"]["role"],
-                content="",
-            )
-        if "contentBlockStart" in chunk:
-            # tool call start
-            delta = chunk["contentBlockStart"]["start"]
-            if "toolUse" in delta:
-                # first index is content
-                index = chunk["contentBlockStart"]["contentBlockIndex"] - 1
-                message = ChatResponseMessage(
-                    tool_calls=[
-                        ToolCall(
-                            index=index,
-                            type="function",
-                            id=delta["toolUse"]["toolUseId"],
-                            function=ResponseFunction(
-                                name=delta["toolUse"]["name"],
-                                arguments="",
-                            ),
-                        )
-                    ]
-                )
-        if "contentBlockDelta" in chunk:
-            delta = chunk["contentBlockDelta"]["delta"]
-            if "text" in delta:
-                # stream content
-                message = ChatResponseMessage(
-                    content=delta["text"],
-                )
-            elif "toolUse" in delta:
-                # tool use
-                index = chunk["contentBlockDelta"]["contentBlockIndex"] - 1
-                message = ChatResponseMessage(
-                    tool_calls=[
-                        ToolCall(
-                            index=index,
-                            function=ResponseFunction(
-                                arguments=delta["toolUse"]["input"],
-                            )
-                        )
-                    ]
+            logger.info("Bedrock response chunk: %s", chunk)
+
+        # Each chunk carries a single event, dispatch on its name
+        event = next(iter(chunk), None)
+        handler = self._stream_event_handlers.get(event)
+        if handler is None:
+            return None
+        return handler(self, chunk[event], message_id, model_id)
+
+    def _delta_response(
+            self, message_id: str, model_id: str, message: ChatResponseMessage, finish_reason: str | None = None
+    ) -> ChatStreamResponse:
+        return ChatStreamResponse.model_construct(
+            id=message_id,
+            model=model_id,
+            choices=[
+                ChoiceDelta.model_construct(
+                    index=0,
+                    delta=message,
+                    logprobs=None,
+                    finish_reason=self._convert_finish_reason(finish_reason),
                 )
-        if "messageStop" in chunk:
-            message = ChatResponseMessage()
-            finish_reason = chunk["messageStop"]["stopReason"]
-
-        if "metadata" in chunk:
-            # usage information in metadata.
-            metadata = chunk["metadata"]
-            if "usage" in metadata:
-                # token usage
-                return ChatStreamResponse(
-                    id=message_id,
-                    model=model_id,
-                    choices=[],
-                    usage=Usage(
-                        prompt_tokens=metadata["usage"]["inputTokens"],
-                        completion_tokens=metadata["usage"]["outputTokens"],
-                        total_tokens=metadata["usage"]["totalTokens"],
+            ],
+            usage=None,
+        )
+
+    def _on_message_start(self, event: dict, message_id: str, model_id: str) -> ChatStreamResponse:
+        message = ChatResponseMessage.model_construct(
+            role=event["role"],
+            content="",
+        )
+        return self._delta_response(message_id, model_id, message)
+
+    def _on_content_block_start(self, event: dict, message_id: str, model_id: str) -> ChatStreamResponse | None:
+        # tool call start
+        delta = event["start"]
+        if "toolUse" not in delta:
+            return None
+        # first index is content
+        index = event["contentBlockIndex"] - 1
+        message = ChatResponseMessage.model_construct(
+            tool_calls=[
+                ToolCall.model_construct(
+                    index=index,
+                    type="function",
+                    id=delta["toolUse"]["toolUseId"],
+                    function=ResponseFunction.model_construct(
+                        name=delta["toolUse"]["name"],
+                        arguments="",
                     ),
                 )
-        if message:
-            return ChatStreamResponse(
-                id=message_id,
-                model=model_id,
-                choices=[
-                    ChoiceDelta(
-                        index=0,
-                        delta=message,
-                        logprobs=None,
-                        finish_reason=self._convert_finish_reason(finish_reason),
+            ]
+        )
+        return self._delta_response(message_id, model_id, message)
+
+    def _on_content_block_delta(self, event: dict, message_id: str, model_id: str) -> ChatStreamResponse | None:
+        delta = event["delta"]
+        if "text" in delta:
+            # stream content
+            message = ChatResponseMessage.model_construct(
+                content=delta["text"],
+            )
+        elif "toolUse" in delta:
+            # tool use
+            index = event["contentBlockIndex"] - 1
+            message = ChatResponseMessage.model_construct(
+                tool_calls=[
+                    ToolCall.model_construct(
+                        index=index,
+                        function=ResponseFunction.model_construct(
+                            arguments=delta["toolUse"]["input"],
+                        )
                     )
-                ],
-                usage=usage,
+                ]
             )
+        else:
+            return None
+        return self._delta_response(message_id, model_id, message)
+
+    def _on_message_stop(self, event: dict, message_id: str, model_id: str) -> ChatStreamResponse:
+        return self._delta_response(
+            message_id, model_id, ChatResponseMessage.model_construct(), finish_reason=event["stopReason"]
+        )
+
+    def _on_metadata(self, event: dict, message_id: str, model_id: str) -> ChatStreamResponse | None:
+        # usage information in metadata.
+        if "usage" not in event:
+            return None
+        # token usage
+        return ChatStreamResponse.model_construct(
+            id=message_id,
+            model=model_id,
+            choices=[],
+            usage=Usage.model_construct(
+                prompt_tokens=event["usage"]["inputTokens"],
+                completion_tokens=event["usage"]["outputTokens"],
+                total_tokens=event["usage"]["totalTokens"],
+            ),
+        )
 
-        return None
+    _stream_event_handlers = {
+        "messageStart": _on_message_start,
+        "contentBlockStart": _on_content_block_start,
+        "contentBlockDelta": _on_content_block_delta,
+        "messageStop": _on_message_stop,
+        "metadata": _on_metadata,
+    }
 
     def _parse_image(self, image_url: str) -> tuple[bytes, str]:
         """Try to get the raw data from an image url.
@@ -910,31 +1104,43 @@ class BedrockModel(BaseChatModel):
         Ref: https://docs.aws.amazon.com/bedrock/latest/APIReference/API_runtime_ImageSource.html
         returns a tuple of (Image Data, Content Type)
         """
-        pattern = r"^data:(image/[a-z]*);base64,\s*"
-        content_type = re.search(pattern, image_url)
+        # Remote urls can't match the data url header, skip the regex for them
+        content_type = image_url.startswith("data:image/") and _DATA_URI_RE.match(image_url)
         # if already base64 encoded.
         # Only supports 'image/jpeg', 'image/png', 'image/gif' or 'image/webp'
         if content_type:
-            image_data = re.sub(pattern, "", image_url)
-            return base64.b64decode(image_data), content_type.group(1)
+            # The header is anchored, so the payload is simply the rest of the url
+            return pybase64.b64decode(image_url[content_type.end():]), content_type.group(1)
+
+        return self._fetch_image(image_url)
 
+    @cached(cache=image_cache, key=image_cache_key, lock=image_cache_lock)
+    def _fetch_image(self, image_url: str) -> tuple[bytes, str]:
+        """Download a remote image, returns a tuple of (Image Data, Content Type).
+
+        Results are cached, as the same images are usually resent on every turn of a conversation.
+        """
         # Send a request to the image URL
-        response = requests.get(image_url)
-        # Check if the request was successful
-        if response.status_code == 200:
+        with http_session.get(image_url, timeout=10, stream=True) as response:
+            # Check if the request was successful
+            if response.status_code != 200:
+                raise HTTPException(
+                    status_code=500, detail="Unable to access the image url"
+                )
+            if int(response.headers.get("Content-Length") or 0) > MAX_IMAGE_BYTES:
+                raise HTTPException(status_code=400, detail="Image is too large")
 
             content_type = response.headers.get("Content-Type")
-            if not content_type.startswith("image"):
+            if not content_type or not content_type.startswith("image"):
                 content_type = "image/jpeg"
-            # Get the image content
-            image_content = response.content
+            # Get the image content, the Content-Length header may be missing so cap the read as well
+            response.raw.decode_content = True
+            image_content = response.raw.read(MAX_IMAGE_BYTES + 1)
+            if len(image_content) > MAX_IMAGE_BYTES:
+                raise HTTPException(status_code=400, detail="Image is too large")
             return image_content, content_type
-        else:
-            raise HTTPException(
-                status_code=500, detail="Unable to access the image url"
-            )
 
-    def _parse_content_parts(
+    async def _parse_content_parts(
             self,
             message: UserMessage,
             model_id: str,
@@ -945,41 +1151,46 @@ class BedrockModel(BaseChatModel):
                     "text": message.content,
                 }
             ]
-        content_parts = []
-        for part in message.content:
+        # One slot per part, assigned in place instead of growing the list
+        content_parts = [None] * len(message.content)
+        image_urls = {}  # {index in content_parts: image url}
+        ignored = False
+        for index, part in enumerate(message.content):
             if isinstance(part, TextContent):
-                content_parts.append(
-                    {
-                        "text": part.text,
-                    }
-                )
+                content_parts[index] = {"text": part.text}
             elif isinstance(part, ImageContent):
                 if not self.is_supported_modality(model_id, modality="IMAGE"):
                     raise HTTPException(
                         status_code=400,
                         detail=f"Multimodal message is currently not supported by {model_id}",
                     )
-                image_data, content_type = self._parse_image(part.image_url.url)
-                content_parts.append(
-                    {
-                        "image": {
-                            "format": content_type[6:],  # image/
-                            "source": {"bytes": image_data},
-                        },
-                    }
-                )
+                # Filled in below, once all the images are fetched
+                image_urls[index] = part.image_url.url
             else:
                 # Ignore..
-                continue
+                ignored = True
+
+        # Fetch the images concurrently on the worker threads, so the event loop stays free
+        # and the latency is the slowest image rather than the sum of them
+        loop = asyncio.get_running_loop()
+        images = await asyncio.gather(
+            *(loop.run_in_executor(image_fetch_executor, self._parse_image, url) for url in image_urls.values())
+        )
+        for index, (image_data, content_type) in zip(image_urls, images):
+            content_parts[index] = {
+                "image": {
+                    "format": content_type[6:],  # image/
+                    "source": {"bytes": image_data},
+                },
+            }
+        if ignored:
+            # Drop the empty slots of ignored parts
+            content_parts = [part for part in content_parts if part is not None]
         return content_parts
 
     @staticmethod
     def is_supported_modality(model_id: str, modality: str = "IMAGE") -> bool:
-        model = bedrock_model_list.get(model_id)
-        modalities = model.get('modalities', [])
-        if modality in modalities:
-            return True
-        return False
+        return modality in bedrock_model_list[model_id]['modalities']
 
     def _convert_tool_spec(self, func: Function) -> dict:
         return {
@@ -1001,18 +1212,30 @@ class BedrockModel(BaseChatModel):
         - content_filter: if content was omitted due to a flag from our content filters,
         - tool_calls: if the model called a tool
         """
-        if finish_reason:
-            finish_reason_mapping = {
-                "tool_use": "tool_calls",
-                "finished": "stop",
-                "end_turn": "stop",
-                "max_tokens": "length",
-                "stop_sequence": "stop",
-                "complete": "stop",
-                "content_filtered": "content_filter"
-            }
-            return finish_reason_mapping.get(finish_reason.lower(), finish_reason.lower())
-        return None
+        if not finish_reason:
+            return None
+        # Bedrock reasons are lower case already, only normalize the unexpected ones
+        converted = FINISH_REASON_MAPPING.get(finish_reason)
+        if converted is None:
+            finish_reason = finish_reason.lower()
+            converted = FINISH_REASON_MAPPING.get(finish_reason, finish_reason)
+        return converted
+
+
+# From this many embeddings, a single vectorized numpy conversion beats packing the rows one by one.
+NUMPY_EMBEDDINGS_THRESHOLD = 32
+
+
+_scratch = threading.local()
+
+
+def get_scratch_buffer(size: int) -> bytearray:
+    """Return a per-thread buffer of at least `size` bytes, reused across embeddings responses."""
+    buffer = getattr(_scratch, "buffer", None)
+    if buffer is None or len(buffer) < size:
+        # Replace rather than resize, a previous response may still hold a memoryview on the old buffer
+        buffer = _scratch.buffer = bytearray(size)
+    return buffer
 
 
 class BedrockEmbeddingsModel(BaseEmbeddingsModel, ABC):
@@ -1020,10 +1243,11 @@ class BedrockEmbeddingsModel(BaseEmbeddingsModel, ABC):
     content_type = "application/json"
 
     def _invoke_model(self, args: dict, model_id: str):
-        body = json.dumps(args)
+        body = orjson.dumps(args)
         if DEBUG:
-            logger.info("Invoke Bedrock Model: " + model_id)
-            logger.info("Bedrock request body: " + body)
+            logger.info("Invoke Bedrock Model: %s", model_id)
+            logger.info("Bedrock request body: %s", body.decode())
+        bedrock_runtime = get_bedrock_runtime()
         try:
             return bedrock_runtime.invoke_model(
                 body=body,
@@ -1038,6 +1262,16 @@ class BedrockEmbeddingsModel(BaseEmbeddingsModel, ABC):
             logger.error(e)
             raise HTTPException(status_code=500, detail=str(e))
 
+    @staticmethod
+    def _read_body(response: dict) -> dict:
+        """Decode the JSON body of an invoke_model response."""
+        body = response["body"]
+        try:
+            # orjson parses straight from the bytes, without an intermediate str
+            return orjson.loads(body.read())
+        finally:
+            body.close()
+
     def _create_response(
             self,
             embeddings: list[float],
@@ -1047,13 +1281,26 @@ class BedrockEmbeddingsModel(BaseEmbeddingsModel, ABC):
             encoding_format: Literal["float", "base64"] = "float",
     ) -> EmbeddingsResponse:
         data = []
-        for i, embedding in enumerate(embeddings):
-            if encoding_format == "base64":
-                arr = np.array(embedding, dtype=np.float32)
-                arr_bytes = arr.tobytes()
-                encoded_embedding = base64.b64encode(arr_bytes)
-                data.append(Embedding(index=i, embedding=encoded_embedding))
+        if encoding_format == "base64":
+            if isinstance(embeddings, np.ndarray) or len(embeddings) > NUMPY_EMBEDDINGS_THRESHOLD:
+                # Convert the whole matrix at once and slice each row out of a single buffer
+                matrix = np.asarray(embeddings, dtype="<f4")
+                buffer = memoryview(matrix.tobytes())
+                row_nbytes = matrix.shape[-1] * matrix.itemsize
+                rows = (buffer[i * row_nbytes:(i + 1) * row_nbytes] for i in range(len(matrix)))
             else:
+                # Lists of floats from the JSON body, pack each row as little-endian float32 in a single call,
+                # into a reused scratch buffer rather than a new bytes object per row
+                packer = struct.Struct(f"<{len(embeddings[0]) if embeddings else 0}f")
+                buffer = get_scratch_buffer(len(embeddings) * packer.size)
+                for i, embedding in enumerate(embeddings):
+                    packer.pack_into(buffer, i * packer.size, *embedding)
+                view = memoryview(buffer)
+                rows = (view[i * packer.size:(i + 1) * packer.size] for i in range(len(embeddings)))
+            for i, row in enumerate(rows):
+                data.append(Embedding(index=i, embedding=pybase64.b64encode_as_string(row)))
+        else:
+            for i, embedding in enumerate(embeddings):
                 data.append(Embedding(index=i, embedding=embedding))
         response = EmbeddingsResponse(
             data=data,
@@ -1086,10 +1333,10 @@ class CohereEmbeddingsModel(BedrockEmbeddingsModel):
                     encodings.append(inner)
                 else:
                     # Iterable[Iterable[int]]
-                    text = ENCODER.decode(list(inner))
+                    text = get_encoder().decode(list(inner))
                     texts.append(text)
             if encodings:
-                texts.append(ENCODER.decode(encodings))
+                texts.append(get_encoder().decode(encodings))
 
         # Maximum of 2048 characters
         args = {
@@ -1103,9 +1350,9 @@ class CohereEmbeddingsModel(BedrockEmbeddingsModel):
         response = self._invoke_model(
             args=self._parse_args(embeddings_request), model_id=embeddings_request.model
         )
-        response_body = json.loads(response.get("body").read())
+        response_body = self._read_body(response)
         if DEBUG:
-            logger.info("Bedrock response body: " + str(response_body))
+            logger.info("Bedrock response body: %s", response_body)
 
         return self._create_response(
             embeddings=response_body["embeddings"],
@@ -1144,9 +1391,9 @@ class TitanEmbeddingsModel(BedrockEmbeddingsModel):
         response = self._invoke_model(
             args=self._parse_args(embeddings_request), model_id=embeddings_request.model
         )
-        response_body = json.loads(response.get("body").read())
+        response_body = self._read_body(response)
         if DEBUG:
-            logger.info("Bedrock response body: " + str(response_body))
+            logger.info("Bedrock response body: %s", response_body)
 
         return self._create_response(
             embeddings=[response_body["embedding"]],
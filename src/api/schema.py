@@ -166,7 +166,7 @@ class EmbeddingsRequest(BaseModel):
 
 class Embedding(BaseModel):
     object: Literal["embedding"] = "embedding"
-    embedding: list[float] | bytes
+    embedding: list[float] | str  # str for base64 encoding_format
     index: int
 
 